@@ -1,82 +1,27 @@
 import os
+import sys
 import logging
+import warnings
 import ebooklib
-import base64
 from ebooklib import epub
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
 import re
+import html
+import hashlib
+import shutil
+import posixpath
+import zipfile
+from urllib.parse import unquote
+from lxml import etree
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, 
                    format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-class EPUBToHTMLConverter:
-    def __init__(self, epub_path, output_dir=None):
-        """
-        Initialize the EPUB to HTML converter
-        
-        :param epub_path: Path to the EPUB file
-        :param output_dir: Directory to save HTML files (defaults to EPUB filename directory)
-        """
-        if not os.path.exists(epub_path):
-            raise FileNotFoundError(f"EPUB file not found: {epub_path}")
-            
-        self.epub_path = epub_path
-        
-        # Set output directory 
-        if output_dir is None:
-            output_dir = os.path.splitext(epub_path)[0] + '_html'
-        self.output_dir = output_dir
-        
-        # Create output directory if it doesn't exist
-        os.makedirs(self.output_dir, exist_ok=True)
-        os.makedirs(os.path.join(self.output_dir, 'images'), exist_ok=True)
-        
-        # Book object
-        self.book = None
-        self.chapters = []
-        self.images = {}
-        
-    def _save_images(self):
-        """Extract and save images from EPUB"""
-        for item in self.book.get_items():
-            if item.get_type() == ebooklib.ITEM_IMAGE:
-                try:
-                    # Create subdirectories if needed
-                    image_name = item.get_name()
-                    image_dir = os.path.dirname(image_name)
-                    if image_dir:
-                        full_image_dir = os.path.join(self.output_dir, 'images', image_dir)
-                        os.makedirs(full_image_dir, exist_ok=True)
-                    
-                    image_path = os.path.join('images', image_name)
-                    full_path = os.path.join(self.output_dir, image_path)
-                    with open(full_path, 'wb') as f:
-                        f.write(item.get_content())
-                    self.images[image_name] = image_path
-                    logger.info(f"Saved image: {image_path}")
-                except Exception as e:
-                    logger.error(f"Error saving image {image_name}: {str(e)}")
-
-    def _process_images_in_content(self, content):
-        """Process images in HTML content"""
-        soup = BeautifulSoup(content, 'html.parser')
-        for img in soup.find_all('image'):
-            href = img.get('xlink:href')
-            if href and href in self.images:
-                img['xlink:href'] = '../' + self.images[href]
-        
-        for img in soup.find_all('img'):
-            src = img.get('src')
-            if src and src in self.images:
-                img['src'] = '../' + self.images[src]
-        
-        return str(soup)
-
-    def _create_stylesheet(self):
-        """Create a CSS file for styling"""
-        css_content = """
+# Stylesheet shared by the TOC and every chapter page
+STYLESHEET_CSS = """
         body {
             font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
             line-height: 1.6;
@@ -152,43 +97,317 @@ class EPUBToHTMLConverter:
             box-shadow: 0 2px 4px rgba(0,0,0,0.1);
         }
         """
-        css_path = os.path.join(self.output_dir, 'style.css')
-        with open(css_path, 'w', encoding='utf-8') as f:
-            f.write(css_content)
-        return 'style.css'
 
-    def _create_navigation(self, current_index, total_chapters):
-        """Create navigation links"""
-        prev_link = f'chapter_{current_index-1:03d}.html' if current_index > 1 else 'index.html'
-        next_link = f'chapter_{current_index+1:03d}.html' if current_index < total_chapters else 'index.html'
-        
-        nav_html = f'''
+# Output files are written as UTF-8 bytes through a 1 MiB buffer
+WRITE_BUFFER_SIZE = 1 << 20
+
+# ProcessPoolExecutor rejects more than 61 workers on Windows
+WINDOWS_MAX_PROCESS_WORKERS = 61
+
+# Number of threads used to write extracted images
+IMAGE_WRITE_WORKERS = 8
+
+# Rendered chapters are cached under <output_dir>/.cache and reused on later
+# runs. Bump TEMPLATE_VERSION whenever chapter page output changes.
+CACHE_DIR_NAME = '.cache'
+TEMPLATE_VERSION = '1'
+
+# Page templates, filled in with str.format()
+NAV_TEMPLATE = '''
         <div class="navigation">
             <a href="{prev_link}" class="nav-button">← Previous</a>
             <a href="index.html" class="nav-button">Table of Contents</a>
             <a href="{next_link}" class="nav-button">Next →</a>
         </div>
         '''
-        return nav_html
 
-    def _extract_cover(self):
+CHAPTER_TEMPLATE = '''<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{title}</title>
+    {css_link}
+</head>
+<body>
+{nav}
+<div class="chapter-content">{body}</div>
+{nav}
+</body>
+</html>
+'''
+
+# The chapter rewriting helpers below are plain functions over bytes and
+# dicts, with no converter or BeautifulSoup state, so worker processes can
+# call them directly.
+
+def _build_image_ref_re(images):
+    """
+    Compile a regex matching <img src="..."> and SVG <image xlink:href="...">
+    references to any of the extracted images in raw chapter bytes
+    
+    :param images: Dictionary of image name to saved path under the output directory
+    :return: (compiled pattern, dict of image name to rewritten URL), both bytes-based;
+             (None, {}) if there are no images
+    """
+    if not images:
+        return None, {}
+    image_urls = {name.encode('utf-8'): f'../{path}'.encode('utf-8') for name, path in images.items()}
+    names = b'|'.join(re.escape(name) for name in image_urls)
+    return re.compile(rb'''(?<=\s)(src|xlink:href)\s*=\s*(["'])(''' + names + rb''')\2'''), image_urls
+
+def _rewrite_image_refs(content, image_re, image_urls):
+    """Point image references in raw chapter bytes at the extracted copies under images/"""
+    if image_re is None:
+        return content
+    return image_re.sub(
+        lambda m: m.group(1) + b'=' + m.group(2) + image_urls[m.group(3)] + m.group(2),
+        content)
+
+CONTAINER_NS = 'urn:oasis:names:tc:opendocument:xmlns:container'
+OPF_NS = 'http://www.idpf.org/2007/opf'
+DC_NS = 'http://purl.org/dc/elements/1.1/'
+
+class _ZipEpubItem:
+    """Manifest entry of a _ZipEpub, read from the archive on demand"""
+    def __init__(self, zf, zip_name, name, media_type, properties):
+        self._zf = zf
+        self._zip_name = zip_name
+        self._name = name
+        self._media_type = media_type
+        self._properties = properties
+
+    def get_name(self):
+        return self._name
+
+    def get_type(self):
+        """Classify the item the same way ebooklib does when reading a book"""
+        if self._media_type == 'application/xhtml+xml':
+            return ebooklib.ITEM_DOCUMENT
+        if self._media_type in epub.IMAGE_MEDIA_TYPES or self._media_type == 'image/jpg':
+            return ebooklib.ITEM_COVER if 'cover-image' in self._properties else ebooklib.ITEM_IMAGE
+        ext = posixpath.splitext(self._name)[1].lower()
+        for item_type, extensions in ebooklib.EXTENSIONS.items():
+            if ext in extensions:
+                return item_type
+        return ebooklib.ITEM_UNKNOWN
+
+    def get_content(self):
+        return self._zf.read(self._zip_name)
+
+    def get_zip_name(self):
+        """Path of the item inside the archive"""
+        return self._zip_name
+
+    def open(self):
+        """Open the item for streaming reads"""
+        return self._zf.open(self._zip_name)
+
+class _ZipEpub:
+    """
+    Minimal EPUB reader working directly on the zip archive
+    
+    Only the container and OPF manifest/metadata are parsed up front; item
+    content is read lazily. Exposes the subset of ebooklib's EpubBook API the
+    converter uses (get_items, get_metadata).
+    """
+    def __init__(self, epub_path):
+        self._zf = zipfile.ZipFile(epub_path)
+        try:
+            container = etree.fromstring(self._zf.read('META-INF/container.xml'))
+            rootfile = container.find(f'.//{{{CONTAINER_NS}}}rootfile[@media-type="application/oebps-package+xml"]')
+            if rootfile is None:
+                raise ValueError("No OPF rootfile in META-INF/container.xml")
+            opf_path = rootfile.get('full-path')
+            opf_dir = posixpath.dirname(opf_path)
+            opf = etree.fromstring(self._zf.read(opf_path))
+            
+            self._metadata = {}
+            metadata = opf.find(f'{{{OPF_NS}}}metadata')
+            if metadata is not None:
+                for element in metadata:
+                    if isinstance(element.tag, str) and element.tag.startswith(f'{{{DC_NS}}}'):
+                        name = element.tag[len(DC_NS) + 2:]
+                        self._metadata.setdefault(name, []).append((element.text, dict(element.attrib)))
+            
+            self._items = []
+            for entry in opf.iterfind(f'{{{OPF_NS}}}manifest/{{{OPF_NS}}}item'):
+                name = unquote(entry.get('href'))
+                zip_name = posixpath.normpath(posixpath.join(opf_dir, name))
+                self._zf.getinfo(zip_name)  # Raises KeyError for missing files
+                properties = entry.get('properties', '').split()
+                self._items.append(_ZipEpubItem(self._zf, zip_name, name, entry.get('media-type'), properties))
+        except Exception:
+            self._zf.close()
+            raise
+
+    def get_items(self):
+        return iter(self._items)
+
+    def get_metadata(self, namespace, name):
+        if namespace != 'DC':
+            return []
+        return self._metadata.get(name, [])
+
+    def close(self):
+        self._zf.close()
+
+def _chapter_source(item, epub_path):
+    """
+    Describe where a worker process finds a chapter's raw content
+    
+    :return: (epub_path, zip name) for items read straight from the archive,
+             so the chapter is only loaded by the worker that converts it;
+             the content bytes for ebooklib items
+    """
+    if isinstance(item, _ZipEpubItem):
+        return epub_path, item.get_zip_name()
+    return item.get_content()
+
+def _read_chapter_source(source):
+    """Return a chapter's raw content from what _chapter_source() produced"""
+    if isinstance(source, bytes):
+        return source
+    epub_path, zip_name = source
+    with zipfile.ZipFile(epub_path) as zf:
+        return zf.read(zip_name)
+
+def _copy_item_content(item, f):
+    """Write an item's content to an open file, streaming it when possible"""
+    if isinstance(item, _ZipEpubItem):
+        with item.open() as src:
+            shutil.copyfileobj(src, f, WRITE_BUFFER_SIZE)
+    else:
+        f.write(item.get_content())
+
+class EPUBToHTMLConverter:
+    def __init__(self, epub_path, output_dir=None, pretty=False, use_cache=True):
+        """
+        Initialize the EPUB to HTML converter
+        
+        :param epub_path: Path to the EPUB file
+        :param output_dir: Directory to save HTML files (defaults to EPUB filename directory)
+        :param pretty: Indent chapter HTML for debugging (slower, larger output)
+        :param use_cache: Reuse chapters rendered by earlier runs from the output directory's cache
+        """
+        if not os.path.exists(epub_path):
+            raise FileNotFoundError(f"EPUB file not found: {epub_path}")
+            
+        self.epub_path = epub_path
+        
+        # Set output directory 
+        if output_dir is None:
+            output_dir = os.path.splitext(epub_path)[0] + '_html'
+        self.output_dir = output_dir
+        self.pretty = pretty
+        self.use_cache = use_cache
+        
+        # Create output directory if it doesn't exist
+        os.makedirs(self.output_dir, exist_ok=True)
+        os.makedirs(os.path.join(self.output_dir, 'images'), exist_ok=True)
+        
+        # Book object
+        self.book = None
+        self.chapters = []
+        self.images = {}
+        self._image_re = None
+        self._image_urls = {}
+        
+    def _classify_items(self):
+        """
+        Sort the book's items into chapters, images and the cover in one pass
+        
+        :return: (document items, image items, cover item or None)
+        """
+        document_items = []
+        image_items = []
+        cover_item = None
+        item_count = 0
+        for item in self.book.get_items():
+            item_count += 1
+            item_type = item.get_type()
+            if item_type == ebooklib.ITEM_DOCUMENT:
+                document_items.append(item)
+            elif item_type == ebooklib.ITEM_IMAGE:
+                image_items.append(item)
+            if cover_item is None and (item_type == ebooklib.ITEM_COVER or item.get_name().lower().endswith(('cover.jpg', 'cover.jpeg', 'cover.png'))):
+                cover_item = item
+        logger.info("Found %d items in EPUB", item_count)
+        return document_items, image_items, cover_item
+
+    def _save_images(self, image_items):
+        """Extract and save images from EPUB"""
+        # Create each image subdirectory once up front rather than per image
+        created = set()
+        for item in image_items:
+            image_dir = os.path.dirname(item.get_name())
+            if image_dir and image_dir not in created:
+                created.add(image_dir)
+                try:
+                    os.makedirs(os.path.join(self.output_dir, 'images', image_dir), exist_ok=True)
+                except OSError as e:
+                    logger.error("Error creating image directory %s: %s", image_dir, e)
+        
+        # Image writes are I/O bound and release the GIL, so overlap them
+        with ThreadPoolExecutor(max_workers=IMAGE_WRITE_WORKERS) as executor:
+            for image_name, image_path in executor.map(self._write_one_image, image_items):
+                if image_path:
+                    self.images[image_name] = image_path
+
+    def _write_one_image(self, item):
+        """
+        Save a single image item under images/
+        
+        Its subdirectory must already exist (see _save_images).
+        
+        :return: (image name, relative image path), path is None on failure
+        """
+        image_name = item.get_name()
+        try:
+            image_path = os.path.join('images', image_name)
+            full_path = os.path.join(self.output_dir, image_path)
+            with open(full_path, 'wb') as f:
+                _copy_item_content(item, f)
+            logger.debug("Saved image: %s", image_path)
+            return image_name, image_path
+        except Exception as e:
+            logger.error("Error saving image %s: %s", image_name, e)
+            return image_name, None
+
+    def _create_stylesheet(self):
+        """Create a CSS file for styling"""
+        css_path = os.path.join(self.output_dir, 'style.css')
+        with open(css_path, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+            f.write(STYLESHEET_CSS.encode('utf-8'))
+        return 'style.css'
+
+    @staticmethod
+    def _create_navigation(current_index, total_chapters):
+        """Create navigation links"""
+        prev_link = f'chapter_{current_index-1:03d}.html' if current_index > 1 else 'index.html'
+        next_link = f'chapter_{current_index+1:03d}.html' if current_index < total_chapters else 'index.html'
+        
+        return NAV_TEMPLATE.format(prev_link=prev_link, next_link=next_link)
+
+    def _extract_cover(self, cover_item):
         """Extract cover image from EPUB"""
+        if cover_item is None:
+            return None
         try:
-            for item in self.book.get_items():
-                if isinstance(item, epub.EpubCover) or item.get_name().lower().endswith(('cover.jpg', 'cover.jpeg', 'cover.png')):
-                    cover_path = os.path.join('images', 'cover' + os.path.splitext(item.get_name())[1])
-                    full_path = os.path.join(self.output_dir, cover_path)
-                    with open(full_path, 'wb') as f:
-                        f.write(item.get_content())
-                    logger.info(f"Extracted cover image: {cover_path}")
-                    return cover_path
+            cover_path = os.path.join('images', 'cover' + os.path.splitext(cover_item.get_name())[1])
+            full_path = os.path.join(self.output_dir, cover_path)
+            with open(full_path, 'wb') as f:
+                _copy_item_content(cover_item, f)
+            logger.info("Extracted cover image: %s", cover_path)
+            return cover_path
         except Exception as e:
-            logger.error(f"Error extracting cover: {str(e)}")
+            logger.error("Error extracting cover: %s", e)
         return None
 
     def _create_toc(self, chapters, cover_path=None):
         """Create table of contents page"""
-        toc_html = f'''
+        # Collect fragments and join once; repeated += is quadratic on long books
+        parts = ['''
         <!DOCTYPE html>
         <html lang="en">
         <head>
@@ -199,61 +418,83 @@ class EPUBToHTMLConverter:
         </head>
         <body>
             <div class="toc">
-        '''
+        ''']
         
         if cover_path:
-            toc_html += f'''
+            parts.append(f'''
                 <div class="cover">
                     <img src="{cover_path}" alt="Book Cover" class="cover-image">
                 </div>
-            '''
+            ''')
         
-        toc_html += '''
+        parts.append('''
                 <h1>Table of Contents</h1>
                 <ul class="toc-list">
-        '''
+        ''')
         
-        for idx, (title, _) in enumerate(chapters, 1):
-            clean_title = title if title else f"Chapter {idx}"
-            toc_html += f'<li><a href="chapter_{idx:03d}.html">{clean_title}</a></li>\n'
+        # Number entries by their chapter file, which stays correct when a
+        # chapter failed to convert and is missing from the list
+        for title, idx in chapters:
+            clean_title = html.escape(title) if title else f"Chapter {idx}"
+            parts.append(f'<li><a href="chapter_{idx:03d}.html">{clean_title}</a></li>\n')
         
-        toc_html += '''
+        parts.append('''
                 </ul>
             </div>
         </body>
         </html>
-        '''
+        ''')
         
-        with open(os.path.join(self.output_dir, 'index.html'), 'w', encoding='utf-8') as f:
-            f.write(toc_html)
+        with open(os.path.join(self.output_dir, 'index.html'), 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+            f.write(''.join(parts).encode('utf-8'))
 
-    def _extract_title(self, soup):
+    @staticmethod
+    def _extract_title(soup):
         """Extract title from HTML content"""
-        # Try different heading tags
-        for tag in ['h1', 'h2', 'title']:
-            title_tag = soup.find(tag)
-            if title_tag:
-                return title_tag.get_text(strip=True)
+        # Prefer h1, then h2, then <title>, resolved in a single walk that
+        # stops at the first h1
+        fallbacks = {}
+        for element in soup.descendants:
+            name = element.name
+            if name == 'h1':
+                return element.get_text(strip=True)
+            if name in ('h2', 'title') and name not in fallbacks:
+                fallbacks[name] = element
+        for tag in ['h2', 'title']:
+            if tag in fallbacks:
+                return fallbacks[tag].get_text(strip=True)
         return None
 
+    def _open_book(self):
+        """Open the EPUB archive directly, falling back to ebooklib for files it can't handle"""
+        try:
+            return _ZipEpub(self.epub_path)
+        except Exception as e:
+            logger.warning("Reading %s with ebooklib instead: %s", self.epub_path, e)
+            return epub.read_epub(self.epub_path)
+
     def convert(self):
         """
         Convert EPUB to HTML files
         
         :return: List of generated HTML file paths
         """
-        logger.info(f"Starting conversion of {self.epub_path}")
+        logger.info("Starting conversion of %s", self.epub_path)
         
         try:
             # Read the EPUB file
-            self.book = epub.read_epub(self.epub_path)
+            self.book = self._open_book()
             logger.info("Successfully loaded EPUB file")
             
+            # Sort items into chapters, images and cover
+            document_items, image_items, cover_item = self._classify_items()
+            
             # Extract and save images
-            self._save_images()
+            self._save_images(image_items)
+            self._image_re, self._image_urls = _build_image_ref_re(self.images)
             
             # Extract cover
-            cover_path = self._extract_cover()
+            cover_path = self._extract_cover(cover_item)
             
             # Create stylesheet
             css_file = self._create_stylesheet()
@@ -263,100 +504,68 @@ class EPUBToHTMLConverter:
             generated_files = []
             chapters = []
             
-            # Get all items
-            items = list(self.book.get_items())
-            logger.info(f"Found {len(items)} items in EPUB")
-            
-            # Process document items
-            document_items = [item for item in items if item.get_type() == ebooklib.ITEM_DOCUMENT]
             total_chapters = len(document_items)
             
-            # Counter for chapters
-            chapter_count = 0
+            # Boilerplate shared by every chapter page is built once per book
+            css_link = f'<link rel="stylesheet" href="{css_file}" type="text/css">'
+            nav_htmls = [self._create_navigation(i, total_chapters) for i in range(1, total_chapters + 1)]
             
-            # Process each item
-            for item in document_items:
-                try:
-                    chapter_count += 1
-                    logger.info(f"Processing chapter {chapter_count}")
-                    
-                    # Extract content
-                    content = item.get_content().decode('utf-8')
-                    
-                    # Process images in content
-                    content = self._process_images_in_content(content)
-                    
-                    # Parse with BeautifulSoup for clean HTML
-                    soup = BeautifulSoup(content, 'html.parser')
-                    
-                    # Extract title
-                    chapter_title = self._extract_title(soup)
-                    chapters.append((chapter_title, chapter_count))
-                    
-                    # Add basic HTML structure if missing
-                    if not soup.find('html'):
-                        new_html = BeautifulSoup('<!DOCTYPE html><html><head></head><body></body></html>', 'html.parser')
-                        new_html.body.append(soup)
-                        soup = new_html
-                    
-                    # Add stylesheet link
-                    if not soup.find('link', {'href': css_file}):
-                        css_link = soup.new_tag('link', href=css_file, rel='stylesheet', type='text/css')
-                        soup.head.append(css_link)
-                    
-                    # Add viewport meta tag
-                    if not soup.find('meta', {'name': 'viewport'}):
-                        meta = soup.new_tag('meta', content='width=device-width, initial-scale=1.0')
-                        meta['name'] = 'viewport'
-                        soup.head.append(meta)
-                    
-                    # Add title if missing
-                    if not soup.title:
-                        title = soup.new_tag('title')
-                        title.string = chapter_title if chapter_title else f"Chapter {chapter_count}"
-                        soup.head.append(title)
-                    
-                    # Wrap content in chapter-content div
-                    if soup.body:
-                        content_div = soup.new_tag('div')
-                        content_div['class'] = 'chapter-content'
-                        for tag in list(soup.body.children):
-                            content_div.append(tag)
-                        soup.body.clear()
-                        soup.body.append(content_div)
-                    
-                    # Add navigation
-                    nav_html = self._create_navigation(chapter_count, total_chapters)
-                    nav_soup = BeautifulSoup(nav_html, 'html.parser')
-                    if soup.body:
-                        soup.body.insert(0, nav_soup)
-                        soup.body.append(nav_soup)
-                    
-                    # Generate filename
-                    filename = f"chapter_{chapter_count:03d}.html"
-                    file_path = os.path.join(self.output_dir, filename)
-                    
-                    # Write clean HTML with proper encoding declaration
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        f.write(str(soup.prettify()))
-                    
-                    logger.info(f"Created HTML file: {filename}")
-                    generated_files.append(file_path)
-                    
-                except Exception as e:
-                    logger.error(f"Error processing chapter {chapter_count}: {str(e)}")
+            # Everything besides the chapter source and its navigation that
+            # shapes a rendered page goes into the cache key
+            cache_dir = None
+            cache_salt = b''
+            if self.use_cache:
+                cache_dir = os.path.join(self.output_dir, CACHE_DIR_NAME)
+                os.makedirs(cache_dir, exist_ok=True)
+                cache_salt = repr((TEMPLATE_VERSION, css_link, sorted(self.images.items()), self.pretty)).encode('utf-8')
+            
+            # Chapters are independent, so spread them across CPU cores.
+            # Workers get plain picklable arguments rather than the book, and
+            # read their chapter from the archive themselves where possible.
+            tasks = [
+                (chapter_count, _chapter_source(item, self.epub_path), nav_htmls[chapter_count - 1], css_link,
+                 self.output_dir, self._image_re, self._image_urls, self.pretty, cache_dir, cache_salt)
+                for chapter_count, item in enumerate(document_items, 1)
+            ]
+            if len(tasks) <= 1:
+                # Not worth starting worker processes for a single chapter
+                results = [_process_chapter(task) for task in tasks]
+            else:
+                max_workers = min(len(tasks), os.cpu_count() or 1)
+                if sys.platform == 'win32':
+                    max_workers = min(max_workers, WINDOWS_MAX_PROCESS_WORKERS)
+                with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                    results = list(executor.map(_process_chapter, tasks))
+            
+            used_cache_keys = set()
+            for result in results:
+                if result is None:
                     continue
+                chapter_count, chapter_title, file_path, cache_key = result
+                chapters.append((chapter_title, chapter_count))
+                generated_files.append(file_path)
+                used_cache_keys.add(cache_key)
+            
+            # Entries left over from older versions of the book would otherwise
+            # pile up in the cache forever
+            if cache_dir is not None:
+                _prune_cache(cache_dir, used_cache_keys)
             
             # Create table of contents with cover
             self._create_toc(chapters, cover_path)
             logger.info("Created table of contents")
             
-            logger.info(f"Conversion complete. Generated {len(generated_files)} HTML files")
+            logger.info("Conversion complete. Generated %d HTML files", len(generated_files))
             return generated_files
             
         except Exception as e:
-            logger.error(f"Error converting EPUB: {str(e)}")
+            logger.error("Error converting EPUB: %s", e)
             raise
+        
+        finally:
+            # Metadata stays available; only item content needs the archive
+            if isinstance(self.book, _ZipEpub):
+                self.book.close()
 
     def get_book_metadata(self):
         """
@@ -368,12 +577,125 @@ class EPUBToHTMLConverter:
         if self.book:
             metadata['title'] = self.book.get_metadata('DC', 'title')[0][0] if self.book.get_metadata('DC', 'title') else 'Unknown Title'
             metadata['creator'] = self.book.get_metadata('DC', 'creator')[0][0] if self.book.get_metadata('DC', 'creator') else 'Unknown Author'
-            logger.info(f"Extracted metadata - Title: {metadata['title']}, Creator: {metadata['creator']}")
+            logger.info("Extracted metadata - Title: %s, Creator: %s", metadata['title'], metadata['creator'])
         return metadata
 
-def main():
-    import sys
+def _process_chapter(args):
+    """
+    Convert a single chapter and write it to disk
+    
+    Runs in a worker process, so it only touches its arguments.
     
+    :param args: (chapter_count, chapter source, nav_html, css_link, output_dir, image_re, image_urls, pretty,
+                  cache_dir, cache_salt); the source comes from _chapter_source(), and
+                  cache_dir is None when caching is disabled
+    :return: (chapter_count, chapter title, file path, cache key), or None on failure;
+             the cache key is None when caching is disabled
+    """
+    (chapter_count, source, nav_html, css_link, output_dir, image_re, image_urls, pretty,
+     cache_dir, cache_salt) = args
+    try:
+        content = _read_chapter_source(source)
+        
+        # Generate filename
+        filename = f"chapter_{chapter_count:03d}.html"
+        file_path = os.path.join(output_dir, filename)
+        
+        # Reuse the page rendered by an earlier run if nothing has changed
+        digest = cache_path = None
+        if cache_dir is not None:
+            digest = hashlib.sha1(content + nav_html.encode('utf-8') + cache_salt).hexdigest()
+            cache_path = os.path.join(cache_dir, digest)
+            cached_title = _load_cached_chapter(cache_path, file_path)
+            if cached_title is not None:
+                logger.debug("Reused cached HTML file: %s", filename)
+                return chapter_count, cached_title or None, file_path, digest
+        
+        logger.debug("Processing chapter %d", chapter_count)
+        
+        # Process images in content
+        content = _rewrite_image_refs(content, image_re, image_urls)
+        
+        # Parse with BeautifulSoup for clean HTML. It is given the raw bytes so
+        # the encoding declared by the chapter itself is honoured. Chapters are
+        # XHTML but go through lxml's HTML builder on purpose: the output is
+        # served as HTML and the HTML builder tolerates malformed markup.
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', XMLParsedAsHTMLWarning)
+            soup = BeautifulSoup(content, 'lxml')
+        
+        # Extract title
+        chapter_title = EPUBToHTMLConverter._extract_title(soup)
+        
+        # Keep only the body markup; the document shell is rebuilt below
+        body_html = soup.body.decode_contents() if soup.body else ''
+        page_title = html.escape(chapter_title if chapter_title else f"Chapter {chapter_count}")
+        
+        page_html = CHAPTER_TEMPLATE.format(title=page_title, css_link=css_link, nav=nav_html, body=body_html)
+        if pretty:
+            page_html = BeautifulSoup(page_html, 'lxml').prettify()
+        
+        # Write clean HTML with proper encoding declaration
+        with open(file_path, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+            f.write(page_html.encode('utf-8'))
+        
+        logger.debug("Created HTML file: %s", filename)
+        
+        if cache_path is not None:
+            _store_cached_chapter(cache_path, chapter_title, file_path)
+        return chapter_count, chapter_title, file_path, digest
+        
+    except Exception as e:
+        logger.error("Error processing chapter %d: %s", chapter_count, e)
+        return None
+
+def _load_cached_chapter(cache_path, file_path):
+    """
+    Copy a cached chapter page into place
+    
+    Missing or unreadable entries count as a miss; the chapter is then
+    re-rendered and the entry rewritten.
+    
+    :return: Cached chapter title ('' if it had none), or None on a cache miss
+    """
+    try:
+        with open(cache_path + '.title', encoding='utf-8') as f:
+            chapter_title = f.read()
+        shutil.copyfile(cache_path + '.html', file_path)
+    except (OSError, UnicodeDecodeError):
+        return None
+    return chapter_title
+
+def _store_cached_chapter(cache_path, chapter_title, file_path):
+    """Copy a rendered chapter into the cache; failures only cost a re-render next time"""
+    try:
+        # The title goes first and the page is moved into place atomically,
+        # so a cached page always has its title next to it
+        with open(cache_path + '.title', 'w', encoding='utf-8') as f:
+            f.write(chapter_title or '')
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        shutil.copyfile(file_path, tmp_path)
+        os.replace(tmp_path, cache_path + '.html')
+    except OSError as e:
+        logger.warning("Could not cache %s: %s", file_path, e)
+
+def _prune_cache(cache_dir, keep):
+    """Delete cache files whose key is not in keep, including temp files of interrupted runs"""
+    try:
+        names = os.listdir(cache_dir)
+    except OSError as e:
+        logger.warning("Could not clean cache %s: %s", cache_dir, e)
+        return
+    for name in names:
+        if name.split('.', 1)[0] in keep:
+            continue
+        try:
+            os.remove(os.path.join(cache_dir, name))
+            logger.debug("Removed stale cache file: %s", name)
+        except OSError as e:
+            logger.warning("Could not remove stale cache file %s: %s", name, e)
+
+def main():
     # Check if EPUB path is provided
     if len(sys.argv) < 2:
         logger.error("No EPUB file specified")
@@ -402,7 +724,7 @@ def main():
             print("\nWarning: No HTML files were generated. This might indicate an issue with the EPUB file structure.")
     
     except Exception as e:
-        logger.error(f"Error: {str(e)}")
+        logger.error("Error: %s", e)
         sys.exit(1)
 
 if __name__ == '__main__':
@@ -1,6 +1,69 @@
 import os
+import glob
+import base64
+import tempfile
 import unittest
-from epub_to_html_converter import EPUBToHTMLConverter
+import zipfile
+import warnings
+from bs4 import BeautifulSoup
+import ebooklib
+from ebooklib import epub
+from epub_to_html_converter import EPUBToHTMLConverter, _ZipEpub
+
+# 1x1 transparent PNG
+PNG_BYTES = base64.b64decode(
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg==')
+
+def write_sample_epub(path):
+    """Write a small EPUB with its OPF in a subdirectory and a percent-encoded href"""
+    chapter = ('<?xml version="1.0" encoding="utf-8"?>'
+               '<html xmlns="http://www.w3.org/1999/xhtml"><head><title>{0}</title></head>'
+               '<body><h1>{0}</h1>'
+               '<p>Text <img src="images/pic.png" alt=""/> <img data-src="images/pic.png" alt=""/></p>'
+               '<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">'
+               '<image xlink:href="images/pic.png"/></svg>'
+               '<p>Hello<a id="pg1"/>after anchor</p><div class="x"/><p>Last paragraph</p>'
+               '</body></html>')
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr('mimetype', 'application/epub+zip', compress_type=zipfile.ZIP_STORED)
+        zf.writestr('META-INF/container.xml',
+                    '<?xml version="1.0"?>'
+                    '<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">'
+                    '<rootfiles><rootfile full-path="OEBPS/content.opf" '
+                    'media-type="application/oebps-package+xml"/></rootfiles></container>')
+        zf.writestr('OEBPS/content.opf',
+                    '<?xml version="1.0" encoding="utf-8"?>'
+                    '<package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="id">'
+                    '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/">'
+                    '<dc:identifier id="id">sample</dc:identifier>'
+                    '<dc:title>Sample Book</dc:title><dc:creator>Jane Doe</dc:creator></metadata>'
+                    '<manifest>'
+                    '<item id="cover" href="images/cover.png" media-type="image/png" properties="cover-image"/>'
+                    '<item id="pic" href="images/pic.png" media-type="image/png"/>'
+                    '<item id="c1" href="text/chapter%201.xhtml" media-type="application/xhtml+xml"/>'
+                    '<item id="c2" href="text/chapter%202.xhtml" media-type="application/xhtml+xml"/>'
+                    '<item id="c3" href="text/chapter%203.xhtml" media-type="application/xhtml+xml"/>'
+                    '<item id="css" href="styles/book.css" media-type="text/css"/>'
+                    '</manifest>'
+                    '<spine><itemref idref="c1"/><itemref idref="c2"/><itemref idref="c3"/></spine></package>')
+        zf.writestr('OEBPS/images/cover.png', PNG_BYTES)
+        zf.writestr('OEBPS/images/pic.png', PNG_BYTES)
+        zf.writestr('OEBPS/text/chapter 1.xhtml', chapter.format('First Chapter'))
+        zf.writestr('OEBPS/text/chapter 2.xhtml', chapter.format('Second Chapter'))
+        # Not every book is UTF-8; this chapter declares its own encoding
+        zf.writestr('OEBPS/text/chapter 3.xhtml',
+                    chapter.format('Café crème')
+                    .replace('encoding="utf-8"', 'encoding="windows-1252"').encode('cp1252'))
+        zf.writestr('OEBPS/styles/book.css', 'p { margin: 0; }')
+
+def convert_first_chapter():
+    """Convert the sample EPUB and return the HTML of its first chapter page"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        epub_path = os.path.join(tmp_dir, 'sample.epub')
+        write_sample_epub(epub_path)
+        html_files = EPUBToHTMLConverter(epub_path, output_dir=os.path.join(tmp_dir, 'out')).convert()
+        with open(html_files[0], encoding='utf-8') as f:
+            return f.read()
 
 class TestEPUBConverter(unittest.TestCase):
     def setUp(self):
@@ -31,6 +94,147 @@ class TestEPUBConverter(unittest.TestCase):
             self.assertIn('title', metadata)
             self.assertIn('creator', metadata)
     
+    def test_navigation_links(self):
+        """Test previous/next links point at the neighbouring chapters"""
+        nav_html = EPUBToHTMLConverter._create_navigation(3, 5)
+        self.assertIn('href="chapter_002.html"', nav_html)
+        self.assertIn('href="chapter_004.html"', nav_html)
+        self.assertNotIn('chapter_003.html', nav_html)
+
+        # First and last chapters link back to the table of contents
+        first_nav = EPUBToHTMLConverter._create_navigation(1, 5)
+        self.assertNotIn('chapter_000.html', first_nav)
+        self.assertIn('href="chapter_002.html"', first_nav)
+        last_nav = EPUBToHTMLConverter._create_navigation(5, 5)
+        self.assertNotIn('chapter_006.html', last_nav)
+        self.assertIn('href="chapter_004.html"', last_nav)
+
+    def test_image_ref_rewriting(self):
+        """Test only real src and xlink:href attributes are rewritten"""
+        page_html = convert_first_chapter()
+        self.assertIn(' src="../images/images/pic.png"', page_html)
+        self.assertIn('xlink:href="../images/images/pic.png"', page_html)
+        self.assertIn('data-src="images/pic.png"', page_html)
+
+    def test_self_closing_tags_in_chapter_body(self):
+        """Test XHTML self-closing tags are written as HTML-safe markup"""
+        page_html = convert_first_chapter()
+        self.assertIn('<a id="pg1"></a>after anchor', page_html)
+        self.assertIn('<div class="x"></div>', page_html)
+
+        # Parsed as a browser would, the navigation stays outside the chapter content
+        soup = BeautifulSoup(page_html, 'lxml')
+        chapter_div = soup.find('div', class_='chapter-content')
+        self.assertIsNone(chapter_div.find('div', class_='navigation'))
+        self.assertEqual(len(soup.body.find_all('div', class_='navigation', recursive=False)), 2)
+
+    def test_non_utf8_chapter(self):
+        """Test chapters in a declared non-UTF-8 encoding are converted"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            epub_path = os.path.join(tmp_dir, 'sample.epub')
+            output_dir = os.path.join(tmp_dir, 'out')
+            write_sample_epub(epub_path)
+
+            html_files = EPUBToHTMLConverter(epub_path, output_dir=output_dir).convert()
+            self.assertEqual([os.path.basename(f) for f in html_files],
+                             ['chapter_001.html', 'chapter_002.html', 'chapter_003.html'])
+            with open(html_files[2], encoding='utf-8') as f:
+                page_html = f.read()
+            self.assertIn('<h1>Café crème</h1>', page_html)
+            self.assertIn(' src="../images/images/pic.png"', page_html)
+
+    def test_toc_links_skip_failed_chapters(self):
+        """Test TOC entries keep pointing at their own chapter file when one is missing"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            epub_path = os.path.join(tmp_dir, 'sample.epub')
+            write_sample_epub(epub_path)
+            converter = EPUBToHTMLConverter(epub_path, output_dir=os.path.join(tmp_dir, 'out'))
+            converter._create_toc([('First Chapter', 1), (None, 3)])
+            with open(os.path.join(converter.output_dir, 'index.html'), encoding='utf-8') as f:
+                toc_html = f.read()
+            self.assertIn('<a href="chapter_001.html">First Chapter</a>', toc_html)
+            self.assertIn('<a href="chapter_003.html">Chapter 3</a>', toc_html)
+            self.assertNotIn('chapter_002.html', toc_html)
+
+    def test_chapter_cache(self):
+        """Test re-runs reuse cached chapters and recover from damaged cache entries"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            epub_path = os.path.join(tmp_dir, 'sample.epub')
+            output_dir = os.path.join(tmp_dir, 'out')
+            write_sample_epub(epub_path)
+
+            html_files = EPUBToHTMLConverter(epub_path, output_dir=output_dir).convert()
+            self.assertEqual(len(html_files), 3)
+            cached_pages = glob.glob(os.path.join(output_dir, '.cache', '*.html'))
+            self.assertEqual(len(cached_pages), 3)
+
+            # Warm cache: pages are copied from the cache instead of re-rendered
+            for cached_page in cached_pages:
+                with open(cached_page, 'a', encoding='utf-8') as f:
+                    f.write('<!-- from cache -->')
+            self.assertEqual(EPUBToHTMLConverter(epub_path, output_dir=output_dir).convert(), html_files)
+            for html_file in html_files:
+                with open(html_file, encoding='utf-8') as f:
+                    self.assertIn('<!-- from cache -->', f.read())
+            with open(os.path.join(output_dir, 'index.html'), encoding='utf-8') as f:
+                self.assertIn('First Chapter', f.read())
+
+            # Damaged cache: entries without a title are re-rendered and repaired
+            for title_file in glob.glob(os.path.join(output_dir, '.cache', '*.title')):
+                os.remove(title_file)
+            self.assertEqual(EPUBToHTMLConverter(epub_path, output_dir=output_dir).convert(), html_files)
+            for html_file in html_files:
+                with open(html_file, encoding='utf-8') as f:
+                    self.assertNotIn('<!-- from cache -->', f.read())
+            with open(os.path.join(output_dir, 'index.html'), encoding='utf-8') as f:
+                self.assertIn('Second Chapter', f.read())
+            self.assertEqual(len(glob.glob(os.path.join(output_dir, '.cache', '*.title'))), 3)
+
+    def test_stale_cache_entries_removed(self):
+        """Test cache entries not used by a run are deleted at the end of it"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            epub_path = os.path.join(tmp_dir, 'sample.epub')
+            output_dir = os.path.join(tmp_dir, 'out')
+            write_sample_epub(epub_path)
+            EPUBToHTMLConverter(epub_path, output_dir=output_dir).convert()
+
+            cache_dir = os.path.join(output_dir, '.cache')
+            current = sorted(os.listdir(cache_dir))
+            for name in ['0123abcd.html', '0123abcd.title', '0123abcd.4242.tmp']:
+                with open(os.path.join(cache_dir, name), 'w', encoding='utf-8') as f:
+                    f.write('stale')
+            EPUBToHTMLConverter(epub_path, output_dir=output_dir).convert()
+            self.assertEqual(sorted(os.listdir(cache_dir)), current)
+
+            # Without the cache, nothing in it is touched
+            with open(os.path.join(cache_dir, '0123abcd.html'), 'w', encoding='utf-8') as f:
+                f.write('stale')
+            EPUBToHTMLConverter(epub_path, output_dir=output_dir, use_cache=False).convert()
+            self.assertIn('0123abcd.html', os.listdir(cache_dir))
+
+    def test_zip_reader_matches_ebooklib(self):
+        """Test the direct zip reader agrees with ebooklib on items and metadata"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            epub_path = os.path.join(tmp_dir, 'sample.epub')
+            write_sample_epub(epub_path)
+
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                expected = epub.read_epub(epub_path)
+            book = _ZipEpub(epub_path)
+            try:
+                items = [(item.get_name(), item.get_type()) for item in book.get_items()]
+                self.assertEqual(items, [(item.get_name(), item.get_type()) for item in expected.get_items()])
+                self.assertIn(('text/chapter 1.xhtml', ebooklib.ITEM_DOCUMENT), items)
+
+                for name in ['title', 'creator', 'identifier', 'language']:
+                    self.assertEqual(book.get_metadata('DC', name), expected.get_metadata('DC', name))
+
+                pic = next(item for item in book.get_items() if item.get_name() == 'images/pic.png')
+                self.assertEqual(pic.get_content(), PNG_BYTES)
+            finally:
+                book.close()
+
     def tearDown(self):
         # Clean up test output directory
         if os.path.exists(self.test_output_dir):